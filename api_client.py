@@ -1,13 +1,50 @@
+import os
+import sys
+import time
 import streamlit as st
 import requests
 import pandas as pd
+import numpy as np
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from config import WEIRDGLOOP_HEADERS, MAPPING_HEADERS
 
-@st.cache_data(ttl="6h")
+# On-disk cache for price histories. st.cache_data only lives in-process, so a
+# server restart (or a fresh worker) used to re-fetch every item from the API.
+# Parquet files survive restarts and load in ~1ms vs a ~200ms HTTP round-trip.
+PRICE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "osrs_rpi")
+PRICE_CACHE_TTL_SECONDS = 6 * 60 * 60  # matches the mapping cache TTL
+
+
+def _read_price_cache(item_id):
+    """Returns a cached DataFrame if a fresh parquet file exists, else None."""
+    path = os.path.join(PRICE_CACHE_DIR, f"{item_id}.parquet")
+    try:
+        if time.time() - os.path.getmtime(path) < PRICE_CACHE_TTL_SECONDS:
+            return pd.read_parquet(path)
+    except (OSError, ValueError):
+        # Missing, unreadable or corrupt cache file - just re-fetch.
+        pass
+    return None
+
+
+def _write_price_cache(item_id, df):
+    """Best-effort parquet write; cache failures never break a fetch."""
+    try:
+        os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+        df.to_parquet(os.path.join(PRICE_CACHE_DIR, f"{item_id}.parquet"))
+    except (OSError, ValueError, ImportError):
+        pass
+
+@st.cache_resource(ttl="6h")
 def get_item_mapping():
     """
     Fetches the complete item ID-to-name mapping from the OSRS Wiki API.
+
+    Cached with cache_resource rather than cache_data: cache_data deep-copies
+    its payload on every hit, and copying a ~20k-entry dict per script rerun
+    is wasted work for read-only lookup data. The returned objects are shared
+    across sessions - treat them as immutable, never mutate them.
     """
     try:
         response = requests.get(
@@ -23,7 +60,9 @@ def get_item_mapping():
         for item in mapping_data:
             # Filter out placeholder/junk items
             if 'name' in item and 'id' in item and not item['name'].startswith("Exchange ticket"):
-                item_name_lower = item['name'].lower()
+                # Interned keys let CPython's dict lookup take the
+                # pointer-identity fast path when callers intern theirs too.
+                item_name_lower = sys.intern(item['name'].lower())
                 mapping_dict[item_name_lower] = {
                     'id': item['id'],
                     'name': item['name']
@@ -39,12 +78,19 @@ def get_item_mapping():
         return None, None
 
 # Caching is re-enabled.
-# This will store the data for 10 minutes to speed up the app.
-@st.cache_data(ttl="10m")
+# One hour matches the downstream calculation caches (_item_inflation etc.) -
+# a shorter TTL here just forced re-fetches that invalidated nothing above.
+@st.cache_data(ttl="1h", show_spinner=False)
 def get_price_history(item_id):
     """
     Fetches full historical data using the 'all' endpoint and returns a DataFrame.
     """
+    # Check the on-disk cache first - it survives server restarts, unlike
+    # the in-memory st.cache_data layer above.
+    cached_df = _read_price_cache(item_id)
+    if cached_df is not None:
+        return cached_df
+
     # This is the correct, final URL
     url = f"https://api.weirdgloop.org/exchange/history/osrs/all?id={item_id}"
 
@@ -85,7 +131,10 @@ def get_price_history(item_id):
         # Ensure prices are numeric, coercing any errors to NaN
         df['avgHighPrice'] = pd.to_numeric(df['avgHighPrice'], errors='coerce')
 
-        # Sort by date (CRITICAL for asof() and resample())
+        # Sort by date exactly once, here. Downstream code (get_indexer,
+        # searchsorted, resample, the cached price arrays) relies on this
+        # frame having a monotonically increasing DatetimeIndex - binary
+        # searches silently degrade to linear scans on an unsorted index.
         df = df.sort_index()
 
         # Resample to a full daily index, taking the mean of any data on the same day
@@ -96,6 +145,16 @@ def get_price_history(item_id):
         # ffill() fills missing values *after* the first data point
         df_daily['avgHighPrice'] = df_daily['avgHighPrice'].bfill().ffill()
 
+        # Store prices as float32: halves the memory held per cached item and
+        # the bytes scanned by every downstream mean/searchsorted/chart pass.
+        # Tradeoff: floats are only exact up to 2^24 (~16.7M gp), so prices
+        # above that round to within ~6e-8 relative - up to ~128 gp on a
+        # billion-gp item. Invisible in inflation percentages, but displayed
+        # prices for the most expensive items may be off by a few gp.
+        df_daily['avgHighPrice'] = df_daily['avgHighPrice'].astype('float32')
+
+        _write_price_cache(item_id, df_daily)
+
         return df_daily
 
     except requests.exceptions.RequestException:
@@ -104,3 +163,39 @@ def get_price_history(item_id):
     except Exception:
         # This catches JSON parsing errors or pandas errors
         return None
+
+
+def get_price_histories(item_ids):
+    """
+    Fetches price histories for several items concurrently.
+
+    The fetches are I/O-bound on the Wiki API, so a small thread pool overlaps
+    the network waits instead of paying one round-trip per item in sequence.
+    Each worker goes through the cached get_price_history, so items that are
+    already cached cost nothing and the per-item cache is warmed for later
+    single-item calls. Returns a dict of item_id -> DataFrame (or None).
+    """
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return dict(zip(item_ids, executor.map(get_price_history, item_ids)))
+
+
+@st.cache_data(ttl="1h", show_spinner=False)
+def get_price_arrays(item_id):
+    """
+    Returns the price history as a (dates, prices) pair of NumPy arrays.
+
+    This is the structure-of-arrays view of get_price_history for the
+    calculator hot path: a contiguous datetime64 index array for searchsorted
+    lookups and a float32 price array (half the bytes scanned; exact only up
+    to ~16.7M gp, sub-ppm relative error above that - see get_price_history).
+    Returns None if no data is available.
+    """
+    price_df = get_price_history(item_id)
+
+    if price_df is None or price_df.empty:
+        return None
+
+    dates = np.ascontiguousarray(price_df.index.values)
+    prices = price_df['avgHighPrice'].to_numpy(dtype=np.float32)
+
+    return dates, prices
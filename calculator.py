@@ -1,45 +1,90 @@
+import sys
 import streamlit as st
 import pandas as pd
-from datetime import datetime, date, timedelta
-from api_client import get_price_history
-from math import floor
+import numpy as np
+from datetime import datetime
+from api_client import get_price_history, get_price_histories, get_price_arrays
+
+class _NullProgress:
+    """No-op stand-in for st.progress when show_progress=False."""
+    def progress(self, *args, **kwargs): pass
+    def empty(self): pass
+
+# Single shared instance - avoids re-creating the class/object on every one of
+# the ~240 calls made by calculate_monthly_rpi_dataframe.
+_NULL_PROGRESS = _NullProgress()
+
 
 def calculate_inflation_percent(old_price, new_price):
     """
     Helper function to calculate percentage change.
     Returns 0.0 if old_price is missing or zero.
     """
-    if old_price is None or new_price is None or pd.isna(old_price) or pd.isna(new_price) or old_price == 0:
+    # 'not old_price' covers None and 0; 'x != x' is the fast NaN test,
+    # avoiding pd.isna's type dispatch on this very hot helper.
+    if not old_price or old_price != old_price or new_price is None or new_price != new_price:
         return 0.0
     return ((new_price - old_price) / old_price) * 100.0
 
-def get_average_price_for_period(item_id, start_date, end_date):
+@st.cache_data(ttl="1h")
+def _monthly_mean_prices(item_id, clamp_leap_feb=False):
     """
-    Retrieves and calculates the average price of an item between start_date and end_date (inclusive).
-    Returns the average price or None if data is insufficient.
+    Calendar-month average prices for an item, indexed by month start.
+
+    Computed once per item from the full price history via resample, so the
+    monthly history build can look month averages up directly instead of
+    re-filtering the daily series for every period.
+
+    With clamp_leap_feb=True, Feb 29th prices are dropped before averaging,
+    so a leap February averages over the 1st-28th only. The chart's year-ago
+    comparison periods use this variant so they match the scorecards'
+    .replace(year=...) arithmetic, which clamps a leap February to the 28th.
+    Returns None if no price data is available.
     """
     price_df = get_price_history(item_id)
+
     if price_df is None or price_df.empty:
         return None
 
-    # Filter the price history DataFrame to the requested period
-    start_dt = pd.to_datetime(start_date)
-    end_dt = pd.to_datetime(end_date)
+    prices = price_df['avgHighPrice']
+
+    if clamp_leap_feb:
+        idx = prices.index
+        prices = prices[~((idx.month == 2) & (idx.day == 29))]
 
-    # Simple filtering on the index (date)
-    period_df = price_df[(price_df.index >= start_dt) & (price_df.index <= end_dt)]
+    return prices.resample('MS').mean()
 
-    # Check if we have at least 1 day of data in the period
-    if period_df.empty:
-        # Fallback: check if the item existed at all before the start date.
-        if price_df.index.max() < start_dt:
-             return None # Item did not exist/was not tracked yet
 
-    # Calculate the mean of the avgHighPrice over the period
-    # If using API data, we are averaging the available daily high prices.
-    avg_price = period_df['avgHighPrice'].mean()
+@st.cache_data(ttl="1h")
+def _average_prices_for_periods(item_id, start_old, end_old, start_new, end_new):
+    """
+    Computes an item's average price over the old and new comparison periods
+    in one pass over the cached price arrays.
+
+    Fusing the two period averages means the item's index is read once and
+    each period becomes a searchsorted slice + mean, instead of two separate
+    full boolean-mask scans of the price series.
+
+    Returns an (old_avg, new_avg) tuple; either value is None when the period
+    contains no data.
+    """
+    arrays = get_price_arrays(item_id)
+
+    if arrays is None:
+        return None, None
+
+    dates, prices = arrays
+
+    def period_mean(start, end):
+        lo = int(np.searchsorted(dates, pd.Timestamp(start).to_datetime64(), side='left'))
+        hi = int(np.searchsorted(dates, pd.Timestamp(end).to_datetime64(), side='right'))
+        if hi <= lo:
+            return None
+        mean = float(np.nanmean(prices[lo:hi]))
+        return None if mean != mean else mean
+
+    return period_mean(start_old, end_old), period_mean(start_new, end_new)
 
-    return avg_price
 
 def calculate_single_item_inflation(item_name, start_date, end_date, mapping_dict):
     """
@@ -53,123 +98,247 @@ def calculate_single_item_inflation(item_name, start_date, end_date, mapping_dic
     if not item_info:
         return {'error': f"ID not found for '{item_name}'. (Item name may be incorrect)"}
 
-    # 2. Get the full price history from the Jagex API
-    item_id = item_info['id']
-    price_df = get_price_history(item_id)
-
-    if price_df is None or price_df.empty:
-        return {'error': f"No price data found for '{item_name}'. (The Wiki API may not list this item, or the request was blocked. Check User-Agent in config.py)"}
-
-    try:
-        # 3. Find the prices for the start and end dates (Point-in-time calculation using .asof())
-        old_price_data = price_df.asof(pd.to_datetime(start_date))
-        new_price_data = price_df.asof(pd.to_datetime(end_date))
+    # 2. The scalar results are cached per (item, dates); the chart frame is
+    # deliberately not part of the cached payload - it's large and already
+    # cached by get_price_history, so we attach it afterwards.
+    result = _single_item_core(item_info['id'], item_name, start_date, end_date)
 
-        # 4. Error checking for dates
-        if old_price_data is None or pd.isna(old_price_data['avgHighPrice']):
-            return {'error': f"No price data found for '{item_name}' on or before {start_date}. (Item may not have existed)"}
+    if result['error'] is None:
+        result['price_df'] = get_price_history(item_info['id'])
 
-        if new_price_data is None or pd.isna(new_price_data['avgHighPrice']):
-            return {'error': f"No price data found for '{item_name}' on or before {end_date}."}
+    return result
 
-        # 5. We have valid data, extract it
-        old_price = old_price_data['avgHighPrice']
-        new_price = new_price_data['avgHighPrice']
 
-        # Get the actual dates from the dataframe index
-        actual_start_date = old_price_data.name.date()
-        actual_end_date = new_price_data.name.date()
-
-        # 6. Calculate inflation
-        inflation_rate = calculate_inflation_percent(old_price, new_price)
+@st.cache_data(ttl="1h", max_entries=500)
+def _single_item_core(item_id, item_name, start_date, end_date):
+    """
+    Cached scalar part of calculate_single_item_inflation: prices, dates and
+    the inflation rate, keyed on (item_id, dates). Repeat queries for the same
+    item and range skip the lookup work entirely.
+    """
+    price_df = get_price_history(item_id)
 
-        # 7. Return the complete result object
-        return {
-            'error': None,
-            'item_name': item_name,
-            'inflation_rate': inflation_rate,
-            'old_price': old_price,
-            'new_price': new_price,
-            'actual_start_date': actual_start_date,
-            'actual_end_date': actual_end_date,
-            'price_df': price_df
-        }
+    if price_df is None or price_df.empty:
+        return {'error': f"No price data found for '{item_name}'. (The Wiki API may not list this item, or the request was blocked. Check User-Agent in config.py)"}
 
-    except Exception as e:
-        return {'error': f"An unexpected error occurred during calculation: {e}"}
+    # 3. Guard against API-format drift: everything below relies on a sorted
+    # DatetimeIndex. All other failure modes are checked explicitly, so there
+    # is no try/except here - genuine programming errors should propagate.
+    if not isinstance(price_df.index, pd.DatetimeIndex):
+        return {'error': f"Price data for '{item_name}' is not indexed by date. (The Wiki API format may have changed)"}
+
+    # 4. Find the prices for the start and end dates (point-in-time lookup).
+    # get_indexer with method='pad' finds the most recent row on or before
+    # each date without the overhead of two .asof() calls.
+    positions = price_df.index.get_indexer(
+        [pd.Timestamp(start_date), pd.Timestamp(end_date)], method='pad'
+    )
+    pos_old, pos_new = positions[0], positions[1]
+
+    # 5. Extract each price scalar once, then check it. 'x != x' is the
+    # fast NaN test - True only for NaN, without pd.isna's type dispatch.
+    old_price = price_df['avgHighPrice'].iat[pos_old] if pos_old != -1 else None
+    new_price = price_df['avgHighPrice'].iat[pos_new] if pos_new != -1 else None
+
+    if old_price is None or old_price != old_price:
+        return {'error': f"No price data found for '{item_name}' on or before {start_date}. (Item may not have existed)"}
+
+    if new_price is None or new_price != new_price:
+        return {'error': f"No price data found for '{item_name}' on or before {end_date}."}
+
+    # Get the actual dates from the dataframe index
+    actual_start_date = price_df.index[pos_old].date()
+    actual_end_date = price_df.index[pos_new].date()
+
+    # 6. Calculate inflation
+    inflation_rate = calculate_inflation_percent(old_price, new_price)
+
+    # 7. Return the complete result object
+    return {
+        'error': None,
+        'item_name': item_name,
+        'inflation_rate': inflation_rate,
+        'old_price': old_price,
+        'new_price': new_price,
+        'actual_start_date': actual_start_date,
+        'actual_end_date': actual_end_date,
+    }
 
 
-@st.cache_data(ttl="1h") # Cache the entire historical calculation for 1 hour
 def calculate_monthly_rpi_dataframe(basket, mapping_dict):
     """
     Generates a DataFrame of monthly YoY RPI figures spanning the entire available history.
     Each point represents the YoY inflation of the *average price* across that full month.
+
+    Not cached at this level on purpose: the expensive part (per-item
+    calendar-month means) is cached in _monthly_mean_prices keyed by item id,
+    so reassembling the chart after a basket tweak only redoes the cheap
+    reindex-and-reweight step. A whole-result cache keyed on the basket and
+    the full mapping dict would be invalidated by any edit and would hash the
+    ~20k-entry mapping on every call.
     """
 
     today = datetime.now().date()
-    # Start at the 1st of the current month
-    current_date = date(today.year, today.month, 1)
-
-    rpi_data = []
 
     # Set a safe limit (e.g., 20 years) to prevent infinite loops if data is sparse
     max_months = 240
 
-    for _ in range(max_months):
-        # Determine the full month period for the current calculation (e.g., October 1 to October 31)
-        # The end date is the last day of the month before the current 'current_date' (which is the 1st of a month)
-        end_of_month = current_date - timedelta(days=1)
-        start_of_month = date(end_of_month.year, end_of_month.month, 1)
-
-        # We need the YoY comparison period as well (the same month, one year prior)
-
-        # --- FIX: Added try/except to handle ValueError when replacing Feb 29th in a non-leap year ---
-        try:
-            start_of_year_ago = start_of_month.replace(year=start_of_month.year - 1)
-            end_of_year_ago = end_of_month.replace(year=end_of_month.year - 1)
-        except ValueError:
-            # This happens if end_of_month is Feb 29th and the target year is not a leap year.
-            # We safely default to Feb 28th for the historical end date in this case.
-            start_of_year_ago = start_of_month.replace(year=start_of_month.year - 1)
-            end_of_year_ago = date(end_of_month.year - 1, end_of_month.month, 28)
-
-        # --- FIX: Stop iterating when the start date would be 2014 or earlier. ---
-        if start_of_year_ago.year <= 2014:
-            break
+    # Precompute every month boundary in one shot instead of hand-rolling the
+    # month-decrement (and its Feb-29th try/except) inside the loop. The most
+    # recent full month ends the day before the 1st of the current month.
+    month_starts = pd.date_range(
+        end=pd.Timestamp(today).replace(day=1) - pd.DateOffset(months=1),
+        periods=max_months,
+        freq='MS'
+    )
+    month_ends = month_starts + pd.offsets.MonthEnd(0)
+
+    # YoY comparison periods: the same month one year prior. DateOffset handles
+    # the Feb-29th-in-a-non-leap-year case for us (clamps to Feb 28th).
+    year_ago_starts = month_starts - pd.DateOffset(years=1)
+    year_ago_ends = month_ends - pd.DateOffset(years=1)
+
+    # Don't bother with months whose comparison period is 2014 or earlier
+    # (no API data exists that far back).
+    valid = year_ago_starts.year > 2014
+
+    # Resolve the basket to item ids once and prefetch every price history
+    # concurrently - on a cold cache the loops below would otherwise fetch
+    # each item's history one network round-trip at a time.
+    basket_ids = [
+        mapping_dict[item_name.lower()]['id']
+        for item_name in basket if item_name.lower() in mapping_dict
+    ]
+    get_price_histories(basket_ids)
+
+    # Find where the basket's data actually runs out, once, instead of
+    # discovering it by computing month after month until one comes back empty.
+    # A month is only computable if at least one basket item has price data
+    # overlapping the year-ago comparison period, so the hard floor is the
+    # earliest first-data date across the basket.
+    first_dates = []
+    for item_id in basket_ids:
+        arrays = get_price_arrays(item_id)
+        if arrays is not None:
+            first_dates.append(arrays[0][0])
+
+    if not first_dates:
+        return pd.DataFrame()
+
+    valid &= year_ago_ends >= pd.Timestamp(min(first_dates))
+
+    new_month_keys = month_starts[valid]
+    old_month_keys = year_ago_starts[valid]
+    chart_dates = month_ends[valid]
+
+    if len(new_month_keys) == 0:
+        return pd.DataFrame()
+
+    # Batch the whole history into one (items x months) matrix computation
+    # instead of ~240 separate basket calculations. Each item's calendar-month
+    # average price is computed once via resample, then aligned to the month
+    # grid and its year-ago counterpart with a reindex.
+    old_rows = []
+    new_rows = []
+    item_weights = []
+
+    for item_name, original_weight in basket.items():
+        item_info = mapping_dict.get(item_name.lower())
+        if not item_info:
+            continue
 
-        # Calculate RPI for this specific month using the full period average
-        rpi_value, excluded = calculate_rpi_period_average(
-            basket,
-            start_of_year_ago,
-            end_of_year_ago,
-            start_of_month,
-            end_of_month,
-            mapping_dict,
-            show_progress=False # Always suppress progress bar for history calculation
-        )
+        monthly_means = _monthly_mean_prices(item_info['id'])
+        if monthly_means is None:
+            continue
 
-        # Stop if no RPI value could be calculated (means the data runs out)
-        if rpi_value is None:
+        # The year-ago side uses the leap-clamped means: a comparison against
+        # a leap February averages Feb 1st-28th, matching the .replace(year=...)
+        # arithmetic the scorecard metrics use for the same comparison.
+        old_means = _monthly_mean_prices(item_info['id'], clamp_leap_feb=True)
+
+        old_rows.append(old_means.reindex(old_month_keys).to_numpy(dtype=np.float64))
+        new_rows.append(monthly_means.reindex(new_month_keys).to_numpy(dtype=np.float64))
+        item_weights.append(original_weight)
+
+    if not item_weights:
+        return pd.DataFrame()
+
+    old = np.vstack(old_rows)
+    new = np.vstack(new_rows)
+    weights = np.asarray(item_weights, dtype=np.float64)
+
+    # An item contributes to a month only if both period averages exist and are
+    # non-zero - the same exclusion rule calculate_rpi_period_average applies.
+    # Weights are renormalized per month over the contributing items.
+    contributes = np.isfinite(old) & np.isfinite(new) & (old != 0) & (new != 0)
+    inflation = np.where(contributes, (new - old) / np.where(contributes, old, 1.0) * 100.0, 0.0)
+    month_weights = np.where(contributes, weights[:, None], 0.0)
+    total_month_weight = month_weights.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rpi_values = (inflation * month_weights).sum(axis=0) / total_month_weight
+
+    # Match the old newest-first walk, which stopped at the first month that
+    # could not be calculated: keep only the contiguous run of computable
+    # months ending at the most recent one.
+    computable = total_month_weight > 0
+    cutoff = 0
+    for i in range(len(computable) - 1, -1, -1):
+        if not computable[i]:
+            cutoff = i + 1
             break
 
-        rpi_data.append({
-            # Anchor the historical point to the last day of the month for plotting consistency
-            'date': end_of_month,
-            'rpi': rpi_value
-        })
-
-        # Move to the previous month (by setting day to 1, then subtracting one day)
-        if current_date.month == 1:
-            current_date = date(current_date.year - 1, 12, 1)
-        else:
-            current_date = date(current_date.year, current_date.month - 1, 1)
-
-    df = pd.DataFrame(rpi_data)
-    if not df.empty:
-        df = df.set_index('date').sort_index()
-        # FIX: Rename the 'rpi' column to 'YoY RPI (%)' to match the Streamlit line_chart call in Home.py
-        df = df.rename(columns={'rpi': 'YoY RPI (%)'})
-    return df
+    if cutoff >= len(rpi_values):
+        return pd.DataFrame()
+
+    return pd.DataFrame(
+        # Anchor each historical point to the last day of its month for plotting
+        # consistency. chart_dates is already a sorted DatetimeIndex slice, so
+        # the frame is built in one shot - no dtype inference, set_index or sort.
+        {'YoY RPI (%)': rpi_values[cutoff:]},
+        index=chart_dates[cutoff:].rename('date')
+    )
+
+@st.cache_data(ttl="1h")
+def _item_inflation(item_id, start_date, end_date):
+    """
+    Calculates point-in-time inflation for a single item between two dates.
+
+    Cached per (item_id, start_date, end_date) so repeated basket calculations
+    (e.g. tweaking one weight, or the 240-month history loop) become dict lookups
+    instead of full asof scans.
+
+    Returns a dict with 'inflation', 'old_price', 'new_price' and an 'error' key
+    ('no_data', 'no_start', 'no_end' or None).
+    """
+    arrays = get_price_arrays(item_id)
+
+    if arrays is None:
+        return {'error': 'no_data'}
+
+    dates, prices = arrays
+
+    # searchsorted on the raw arrays keeps the "most recent price on or before
+    # date" semantics of .asof() without touching pandas indexing machinery.
+    pos_old = int(np.searchsorted(dates, pd.Timestamp(start_date).to_datetime64(), side='right')) - 1
+    pos_new = int(np.searchsorted(dates, pd.Timestamp(end_date).to_datetime64(), side='right')) - 1
+
+    if pos_old < 0 or np.isnan(prices[pos_old]):
+        return {'error': 'no_start'}
+
+    if pos_new < 0 or np.isnan(prices[pos_new]):
+        return {'error': 'no_end'}
+
+    old_price = float(prices[pos_old])
+    new_price = float(prices[pos_new])
+
+    return {
+        'error': None,
+        'inflation': calculate_inflation_percent(old_price, new_price),
+        'old_price': old_price,
+        'new_price': new_price,
+    }
+
 
 def calculate_rpi(basket, start_date, end_date, mapping_dict, show_progress=True):
     """
@@ -177,7 +346,11 @@ def calculate_rpi(basket, start_date, end_date, mapping_dict, show_progress=True
     'show_progress' controls whether a Streamlit progress bar is displayed.
     """
 
-    valid_results = []
+    # Parallel lists (structure-of-arrays) instead of a list of per-item dicts:
+    # no dict allocation per valid item, and they feed straight into the NumPy
+    # reduction at the end.
+    valid_inflations = []
+    valid_weights = []
     excluded_items = []
     total_valid_weight = 0.0
 
@@ -189,52 +362,74 @@ def calculate_rpi(basket, start_date, end_date, mapping_dict, show_progress=True
     if show_progress:
         progress_bar = st.progress(0, text="Initializing RPI calculation...")
     else:
-        class DummyProgress:
-            def progress(self, *args, **kwargs): pass
-            def empty(self): pass
-        progress_bar = DummyProgress()
-
-    for i, (item_name, original_weight) in enumerate(basket.items()):
+        progress_bar = _NULL_PROGRESS
+
+    # Update the bar every ~5% of items rather than every item - each .progress()
+    # call is a websocket round-trip that the browser coalesces anyway.
+    basket_size = len(basket)
+    progress_step = max(1, basket_size // 20)
+
+    # Normalize basket names to lowercase once, up front - .lower() allocates a
+    # new string every time, and the name is needed in lowercase both for the
+    # mapping lookup and the progress text.
+    basket_items = [(name, sys.intern(name.lower()), weight) for name, weight in basket.items()]
+
+    # Convert the dates once instead of once per basket item; _item_inflation
+    # accepts Timestamps directly (they also make stable cache keys).
+    start_ts = pd.Timestamp(start_date)
+    end_ts = pd.Timestamp(end_date)
+
+    # Fast abort: Wiki price data only starts in 2015 (the same boundary the
+    # monthly chart uses), so a window ending before then can't produce a
+    # price for any item - skip the whole basket's fetches and per-item loop.
+    if end_ts.year < 2015:
         if show_progress:
-            progress_text = f"Calculating for '{item_name.lower()}' ({i+1}/{len(basket)})..."
-            progress_bar.progress((i+1) / len(basket), text=progress_text)
-
-        item_info = mapping_dict.get(item_name.lower())
+            progress_bar.empty()
+        # Keep the per-item wording the main loop would have produced:
+        # unmapped items are an "ID not found", not a missing-data problem.
+        return None, [
+            f"{item_name} (ID not found)" if lower_name not in mapping_dict
+            else f"{item_name} (No data at end date: {end_date})"
+            for item_name, lower_name, _ in basket_items
+        ]
+
+    # Prefetch every item's price history concurrently so a cold cache doesn't
+    # serialize one network round-trip per basket item.
+    prefetch_ids = [
+        mapping_dict[lower_name]['id']
+        for _, lower_name, _ in basket_items if lower_name in mapping_dict
+    ]
+    get_price_histories(prefetch_ids)
+
+    for i, (item_name, lower_name, original_weight) in enumerate(basket_items):
+        if show_progress and (i % progress_step == 0 or i == basket_size - 1):
+            progress_text = f"Calculating for '{lower_name}' ({i+1}/{basket_size})..."
+            progress_bar.progress((i+1) / basket_size, text=progress_text)
+
+        item_info = mapping_dict.get(lower_name)
         if not item_info:
             excluded_items.append(f"{item_name} (ID not found)")
             continue
 
         item_id = item_info['id']
-        price_df = get_price_history(item_id)
 
-        if price_df is None or price_df.empty:
+        # Cached per (item_id, start_date, end_date) - see _item_inflation
+        result = _item_inflation(item_id, start_ts, end_ts)
+
+        if result['error'] == 'no_data':
             excluded_items.append(f"{item_name} (No price data from Wiki API)")
             continue
 
-        # --- Use .asof() for point-in-time price (the original logic) ---
-        old_price_data = price_df.asof(pd.to_datetime(start_date))
-        new_price_data = price_df.asof(pd.to_datetime(end_date))
-
-        # 4. Check if data exists for those dates
-        if old_price_data is None or pd.isna(old_price_data['avgHighPrice']):
+        if result['error'] == 'no_start':
             excluded_items.append(f"{item_name} (Did not exist at start date: {start_date})")
             continue
 
-        if new_price_data is None or pd.isna(new_price_data['avgHighPrice']):
+        if result['error'] == 'no_end':
             excluded_items.append(f"{item_name} (No data at end date: {end_date})")
             continue
 
-        # 5. Data is valid! Calculate item-specific inflation
-        old_price = old_price_data['avgHighPrice']
-        new_price = new_price_data['avgHighPrice']
-
-        item_inflation = calculate_inflation_percent(old_price, new_price)
-
-        valid_results.append({
-            'name': item_name,
-            'inflation': item_inflation,
-            'original_weight': original_weight
-        })
+        valid_inflations.append(result['inflation'])
+        valid_weights.append(original_weight)
         total_valid_weight += original_weight
 
     if show_progress:
@@ -244,50 +439,86 @@ def calculate_rpi(basket, start_date, end_date, mapping_dict, show_progress=True
         return None, excluded_items
 
     # --- Final RPI Calculation (Re-weighting) ---
-    final_rpi = 0.0
-    for item in valid_results:
-        new_weight = item['original_weight'] / total_valid_weight
-        weighted_contribution = item['inflation'] * new_weight
-        final_rpi += weighted_contribution
+    # Vectorized: one dot product instead of a Python loop over every valid item.
+    # This matters because calculate_rpi is called once per month when building the history chart.
+    infl = np.fromiter(valid_inflations, dtype=np.float64, count=len(valid_inflations))
+    weights = np.fromiter(valid_weights, dtype=np.float64, count=len(valid_weights))
+    final_rpi = float(np.dot(infl, weights) / weights.sum())
 
     return final_rpi, excluded_items
 
 
+@st.cache_data(ttl="1h")
+def calculate_rpi_cached(basket_items, start_date, end_date, _mapping_dict):
+    """
+    Whole-result cache over calculate_rpi for identical repeat queries.
+
+    'basket_items' must be a sorted tuple of (name, weight) pairs - sorting
+    means the same basket hits the same cache entry no matter what order the
+    user added items in. The mapping dict is underscore-prefixed so Streamlit
+    doesn't hash its ~20k entries on every call.
+
+    Returns (rpi_value, excluded_items).
+    """
+    return calculate_rpi(dict(basket_items), start_date, end_date, _mapping_dict, show_progress=False)
+
+
 def calculate_rpi_period_average(basket, start_old, end_old, start_new, end_new, mapping_dict, show_progress=True):
     """
     Calculates the weighted RPI for a basket of goods using the AVERAGE PRICE over two distinct periods.
     This is used for monthly RPI history.
     """
 
-    valid_results = []
+    # Parallel lists (structure-of-arrays), matching calculate_rpi - no dict
+    # allocation per valid item, and they feed np.fromiter directly.
+    valid_inflations = []
+    valid_weights = []
     excluded_items = []
     total_valid_weight = 0.0
 
     if show_progress:
         progress_bar = st.progress(0, text="Initializing Averaged RPI calculation...")
     else:
-        class DummyProgress:
-            def progress(self, *args, **kwargs): pass
-            def empty(self): pass
-        progress_bar = DummyProgress()
-
-    for i, (item_name, original_weight) in enumerate(basket.items()):
-        if show_progress:
-            progress_text = f"Calculating average for '{item_name.lower()}' ({i+1}/{len(basket)})..."
-            progress_bar.progress((i+1) / len(basket), text=progress_text)
-
-        item_info = mapping_dict.get(item_name.lower())
+        progress_bar = _NULL_PROGRESS
+
+    # Prefetch every item's price history concurrently, same as calculate_rpi -
+    # a cold cache otherwise serializes one network round-trip per item.
+    prefetch_ids = [
+        mapping_dict[item_name.lower()]['id']
+        for item_name in basket if item_name.lower() in mapping_dict
+    ]
+    get_price_histories(prefetch_ids)
+
+    # Convert the four period boundaries once instead of once per item.
+    start_old_ts = pd.Timestamp(start_old)
+    end_old_ts = pd.Timestamp(end_old)
+    start_new_ts = pd.Timestamp(start_new)
+    end_new_ts = pd.Timestamp(end_new)
+
+    # Throttled progress updates, matching calculate_rpi.
+    basket_size = len(basket)
+    progress_step = max(1, basket_size // 20)
+
+    # Lowercase each name once, matching calculate_rpi - it's needed for both
+    # the progress text and the mapping lookup.
+    basket_items = [(name, sys.intern(name.lower()), weight) for name, weight in basket.items()]
+
+    for i, (item_name, lower_name, original_weight) in enumerate(basket_items):
+        if show_progress and (i % progress_step == 0 or i == basket_size - 1):
+            progress_text = f"Calculating average for '{lower_name}' ({i+1}/{basket_size})..."
+            progress_bar.progress((i+1) / basket_size, text=progress_text)
+
+        item_info = mapping_dict.get(lower_name)
         if not item_info:
             excluded_items.append(f"{item_name} (ID not found)")
             continue
 
         item_id = item_info['id']
 
-        # 1. Get average price for the OLD period (one year ago)
-        old_price = get_average_price_for_period(item_id, start_old, end_old)
-
-        # 2. Get average price for the NEW period (the current month)
-        new_price = get_average_price_for_period(item_id, start_new, end_new)
+        # Get both period averages in one fused pass over the price arrays
+        old_price, new_price = _average_prices_for_periods(
+            item_id, start_old_ts, end_old_ts, start_new_ts, end_new_ts
+        )
 
         # 3. Check for valid data
         if old_price is None or pd.isna(old_price) or old_price == 0:
@@ -299,13 +530,8 @@ def calculate_rpi_period_average(basket, start_old, end_old, start_new, end_new,
             continue
 
         # 4. Data is valid! Calculate item-specific inflation
-        item_inflation = calculate_inflation_percent(old_price, new_price)
-
-        valid_results.append({
-            'name': item_name,
-            'inflation': item_inflation,
-            'original_weight': original_weight
-        })
+        valid_inflations.append(calculate_inflation_percent(old_price, new_price))
+        valid_weights.append(original_weight)
         total_valid_weight += original_weight
 
     if show_progress:
@@ -315,10 +541,9 @@ def calculate_rpi_period_average(basket, start_old, end_old, start_new, end_new,
         return None, excluded_items
 
     # --- Final RPI Calculation (Re-weighting) ---
-    final_rpi = 0.0
-    for item in valid_results:
-        new_weight = item['original_weight'] / total_valid_weight
-        weighted_contribution = item['inflation'] * new_weight
-        final_rpi += weighted_contribution
+    # Same vectorized dot-product reduction as calculate_rpi.
+    infl = np.fromiter(valid_inflations, dtype=np.float64, count=len(valid_inflations))
+    weights = np.fromiter(valid_weights, dtype=np.float64, count=len(valid_weights))
+    final_rpi = float(np.dot(infl, weights) / weights.sum())
 
     return final_rpi, excluded_items
@@ -1,7 +1,7 @@
 import streamlit as st
 from datetime import datetime, timedelta
 from api_client import get_item_mapping
-from calculator import calculate_single_item_inflation, calculate_rpi
+from calculator import calculate_single_item_inflation, calculate_rpi_cached
 import pandas as pd
 
 st.set_page_config(page_title="Custom Calculator", page_icon="🎛️", layout="wide")
@@ -87,12 +87,21 @@ with col1:
                             with res_col2:
                                 st.metric(label=f"Price on {result['actual_end_date']}", value=f"{int(result['new_price']):,} gp")
 
-                            st.subheader("Price History Chart")
-                            chart_df = result['price_df']
-                            # Filter dataframe to the selected range for a cleaner chart
-                            chart_df = chart_df[chart_df.index >= pd.to_datetime(start_date)]
-                            chart_df = chart_df[chart_df.index <= pd.to_datetime(end_date)]
-                            st.line_chart(chart_df['avgHighPrice'])
+                            # The chart lives in a collapsed expander: the data
+                            # is still sent on this rerun (expanders don't defer
+                            # execution), but the browser skips rendering the
+                            # multi-year chart until the user opens it, and the
+                            # numeric results stay front and centre.
+                            with st.expander("Price History Chart"):
+                                chart_df = result['price_df']
+                                # Filter dataframe to the selected range for a cleaner chart.
+                                # The index is sorted, so two binary searches + an iloc
+                                # slice (a view) beat scanning the whole index twice
+                                # and copying the frame for each boolean mask.
+                                lo = chart_df.index.searchsorted(pd.Timestamp(start_date), side='left')
+                                hi = chart_df.index.searchsorted(pd.Timestamp(end_date), side='right')
+                                chart_df = chart_df.iloc[lo:hi]
+                                st.line_chart(chart_df['avgHighPrice'])
 
     elif mode == "Custom RPI Basket":
         st.subheader("3. Build Custom Basket")
@@ -102,8 +111,8 @@ with col1:
             st.session_state.custom_basket = {}
 
         # --- UI for adding items to the basket ---
-        form_col1, form_col2, form_col3 = st.columns([3, 1, 1])
-
+        # The widgets live in a form so editing the name/weight doesn't re-run
+        # the whole script per keystroke - one rerun happens on 'Add'.
         # --- FIX 2 (ValueError) ---
         # Apply the same fix here for the second select box.
         try:
@@ -111,24 +120,29 @@ with col1:
         except ValueError:
             default_index_2 = 0 # Default to the first item
 
-        with form_col1:
-            new_item_name = st.selectbox(
-                "Item Name:",
-                options=item_names_list,
-                index=default_index_2, # Use the safe default index
-                key="basket_item_name"
-            )
-        with form_col2:
-            new_item_weight = st.number_input("Weight", min_value=1, value=1, key="basket_item_weight")
-
-        with form_col3:
-            st.markdown("##") # Spacer
-            if st.button("Add", use_container_width=True):
-                if new_item_name in st.session_state.custom_basket:
-                    st.warning(f"'{new_item_name}' is already in the basket. Use 'Remove' to change it.")
-                else:
-                    st.session_state.custom_basket[new_item_name] = new_item_weight
-                    st.rerun()
+        with st.form("add_basket_item"):
+            form_col1, form_col2, form_col3 = st.columns([3, 1, 1])
+
+            with form_col1:
+                new_item_name = st.selectbox(
+                    "Item Name:",
+                    options=item_names_list,
+                    index=default_index_2, # Use the safe default index
+                    key="basket_item_name"
+                )
+            with form_col2:
+                new_item_weight = st.number_input("Weight", min_value=1, value=1, key="basket_item_weight")
+
+            with form_col3:
+                st.markdown("##") # Spacer
+                add_clicked = st.form_submit_button("Add", use_container_width=True)
+
+        if add_clicked:
+            if new_item_name in st.session_state.custom_basket:
+                st.warning(f"'{new_item_name}' is already in the basket. Use 'Remove' to change it.")
+            else:
+                st.session_state.custom_basket[new_item_name] = new_item_weight
+                st.rerun()
 
         # --- Display the basket ---
         if st.session_state.custom_basket:
@@ -147,33 +161,53 @@ with col1:
                         st.rerun()
 
             st.markdown("---")
-            if st.button("Calculate Custom RPI", type="primary", use_container_width=True):
-                if start_date >= end_date:
-                    st.error("Start date must be before the end date.")
-                else:
-                    with col2:
-                        st.subheader("Custom RPI Results")
+            calc_clicked = st.button("Calculate Custom RPI", type="primary", use_container_width=True)
 
-                        # --- Run RPI Calculation ---
-                        rpi_value, excluded = calculate_rpi(
-                            st.session_state.custom_basket,
-                            start_date,
-                            end_date,
-                            mapping_dict
-                        )
+            # Sorted tuple so the cache key is order-independent.
+            basket_key = tuple(sorted(st.session_state.custom_basket.items()))
+            current_key = (basket_key, start_date, end_date)
+            last_rpi = st.session_state.get("last_rpi")
 
-                        if rpi_value is not None:
-                            st.metric(
-                                label=f"Weighted Inflation ({start_date} to {end_date})",
-                                value=f"{rpi_value:.2f}%"
+            if calc_clicked and start_date >= end_date:
+                st.error("Start date must be before the end date.")
+            elif calc_clicked or (last_rpi is not None and last_rpi["key"] == current_key):
+                with col2:
+                    st.subheader("Custom RPI Results")
+
+                    if last_rpi is not None and last_rpi["key"] == current_key:
+                        # Same basket and dates as the last run - re-render the
+                        # memoized result instead of recomputing. Without this,
+                        # any unrelated widget interaction (e.g. switching mode
+                        # and back) would discard the results pane.
+                        rpi_value = last_rpi["value"]
+                        excluded = last_rpi["excluded"]
+                    else:
+                        # --- Run RPI Calculation ---
+                        with st.spinner("Calculating custom RPI..."):
+                            rpi_value, excluded = calculate_rpi_cached(
+                                basket_key,
+                                start_date,
+                                end_date,
+                                mapping_dict
                             )
-                            if excluded:
-                                st.warning("Some items were excluded:")
-                                for item in excluded:
-                                    st.markdown(f"- {item}")
-                        else:
-                            st.error("Could not calculate RPI. No valid data was found for any item in the basket.")
-                            if excluded:
-                                st.subheader("Reasons for failure:")
-                                for item in excluded:
-                                    st.markdown(f"- {item}")
+                        st.session_state.last_rpi = {
+                            "key": current_key,
+                            "value": rpi_value,
+                            "excluded": excluded
+                        }
+
+                    if rpi_value is not None:
+                        st.metric(
+                            label=f"Weighted Inflation ({start_date} to {end_date})",
+                            value=f"{rpi_value:.2f}%"
+                        )
+                        if excluded:
+                            st.warning("Some items were excluded:")
+                            for item in excluded:
+                                st.markdown(f"- {item}")
+                    else:
+                        st.error("Could not calculate RPI. No valid data was found for any item in the basket.")
+                        if excluded:
+                            st.subheader("Reasons for failure:")
+                            for item in excluded:
+                                st.markdown(f"- {item}")